@@ -19,13 +19,21 @@ Flow:
 
 from __future__ import annotations
 
+import bisect
 import hashlib
+import io
+import itertools
 import json
+import multiprocessing
 import os
 import re
+import sys
+import tarfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache, partial
 from datetime import datetime, date, time, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import requests
 import yaml
@@ -35,20 +43,44 @@ try:
 except ImportError:  # pragma: no cover
     from backports.zoneinfo import ZoneInfo  # type: ignore
 
+try:
+    import orjson  # faster JSON decoding of API payloads; json is the fallback
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:
+    from yaml import CSafeLoader as YamlSafeLoader  # libyaml-backed, when PyYAML was built with it
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as YamlSafeLoader  # type: ignore
+
 
 # -----------------------------
 # Config / Models
 # -----------------------------
 
-@dataclass(frozen=True)
+# Slotted models: no per-instance __dict__ for the thousands of records built per run
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class TeamInfo:
     team_id: int
     name: str
     division_name: str
     division_short: str
+    slug: str  # slugify(name), for file names
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
+class NonGameDay:
+    """Parsed non-game day record (holiday/other/etc.), rendered as an all-day event."""
+    day_id: str  # as used in UIDs
+    day_type: str
+    title: str
+    day_date: date
+    description: str
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class GameRef:
     """Normalized per-game record derived from a game_days 'game' object + its parent day record."""
     game_id: int
@@ -66,6 +98,7 @@ class GameRef:
 
     # game fields
     status: str  # scheduled / completed / cancelled (per your note)
+    status_norm: str  # status.lower(), for comparisons
     start_local: Optional[datetime]
     end_local: Optional[datetime]
 
@@ -77,6 +110,11 @@ class GameRef:
     home_score: Optional[int]
     away_score: Optional[int]
     result: Optional[str]  # final / final_ot / final_so / etc
+    result_norm: str  # (result or "").lower(), for comparisons
+
+    # precomputed 'W'/'L' per side for completed games (None otherwise)
+    home_wl: Optional[str]
+    away_wl: Optional[str]
 
     # opening/closing responsibilities are on the DAY object
     opening_team_id: Optional[int]
@@ -85,34 +123,127 @@ class GameRef:
     # placeholder?
     is_placeholder: bool
 
+    # chronological sort key: start time (or day midnight) as a POSIX timestamp
+    sort_ts: float
+
 
 # -----------------------------
 # HTTP helpers
 # -----------------------------
 
-def fetch_json(url: str, timeout: int = 30) -> Any:
-    r = requests.get(url, timeout=timeout)
+def make_session() -> requests.Session:
+    """
+    Shared session so the API calls reuse one keep-alive connection (one
+    TCP/TLS handshake).
+    """
+    session = requests.Session()
+    session.headers.update({"Accept": "application/json", "User-Agent": "btsh-ics"})
+    return session
+
+_SESSION = make_session()
+
+def decode_json(raw: bytes) -> Any:
+    # Decode straight from the raw bytes; skips the text decode step
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _http_cache_paths(cache_dir: str, url: str) -> Tuple[str, str]:
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.meta.json"), os.path.join(cache_dir, f"{key}.body")
+
+def fetch_bytes_cached(url: str, cache_dir: str, timeout: int = 30, ttl: float = 0) -> bytes:
+    """
+    GET `url` through a copy cached in `cache_dir`. A copy younger than `ttl`
+    seconds (by file mtime) is used as-is, with no request at all. Otherwise it
+    is revalidated with If-None-Match / If-Modified-Since and reused on 304, so
+    an unchanged payload is neither downloaded again nor trusted without asking.
+    """
+    meta_path, body_path = _http_cache_paths(cache_dir, url)
+    if ttl > 0:
+        try:
+            if datetime.now(timezone.utc).timestamp() - os.path.getmtime(body_path) < ttl:
+                with open(body_path, "rb") as f:
+                    return f.read()
+        except OSError:
+            pass
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+
+    headers: Dict[str, str] = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    r = _SESSION.get(url, timeout=timeout, headers=headers)
+    if r.status_code == 304:
+        try:
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(body_path)  # just revalidated: restart its ttl
+            return body
+        except OSError:
+            # Cached body went missing; fetch it again unconditionally
+            r = _SESSION.get(url, timeout=timeout)
     r.raise_for_status()
-    return r.json()
 
+    body = r.content
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    if etag or last_modified or ttl > 0:
+        # Body first, so the metadata never points at a body that isn't there.
+        # Both are replaced atomically: the ttl path trusts whatever body it finds,
+        # so an interrupted run must not leave a truncated one behind.
+        write_bytes_atomic(body_path, body)
+        write_bytes_atomic(meta_path, json.dumps({"url": url, "etag": etag, "last_modified": last_modified}).encode("utf-8"))
+    return body
+
+def fetch_json(url: str, timeout: int = 30, cache_dir: Optional[str] = None, cache_ttl: float = 0) -> Any:
+    if cache_dir:
+        return decode_json(fetch_bytes_cached(url, cache_dir, timeout=timeout, ttl=cache_ttl))
+    r = _SESSION.get(url, timeout=timeout)
+    r.raise_for_status()
+    return decode_json(r.content)
 
 # -----------------------------
 # Time helpers
 # -----------------------------
 
+# A season only has a few dozen distinct days and start/end times, so the
+# parsers below are memoized on the raw string. The API's fixed-width forms
+# are sliced directly; anything else goes through strptime as before.
+
+def _is_ascii_digits(s: str) -> bool:
+    return s.isascii() and s.isdigit()
+
+@lru_cache(maxsize=4096)
 def parse_day_yyyy_mm_dd(s: str) -> date:
+    if len(s) == 10 and s[4] == "-" and s[7] == "-" and _is_ascii_digits(s[:4] + s[5:7] + s[8:]):
+        return date(int(s[:4]), int(s[5:7]), int(s[8:]))
     return datetime.strptime(s, "%Y-%m-%d").date()
 
 def parse_hh_mm_ss(s: Optional[str]) -> Optional[time]:
     if not s:
         return None
+    return _parse_hh_mm_ss_cached(s)
+
+@lru_cache(maxsize=4096)
+def _parse_hh_mm_ss_cached(s: str) -> time:
     # game_days uses "15:45:00" strings
+    if len(s) == 8 and s[2] == ":" and s[5] == ":" and _is_ascii_digits(s[:2] + s[3:5] + s[6:]):
+        return time(int(s[:2]), int(s[3:5]), int(s[6:]))
     return datetime.strptime(s, "%H:%M:%S").time()
 
 def local_dt(day: date, t: Optional[time], tz: ZoneInfo) -> Optional[datetime]:
     if t is None:
         return None
-    return datetime(day.year, day.month, day.day, t.hour, t.minute, t.second, tzinfo=tz)
+    # One C-level call; parsed times are naive with no microseconds
+    return datetime.combine(day, t, tzinfo=tz)
 
 def ensure_end_after_start(start: Optional[datetime], end: Optional[datetime]) -> Optional[datetime]:
     if start and end and end <= start:
@@ -122,17 +253,19 @@ def ensure_end_after_start(start: Optional[datetime], end: Optional[datetime]) -
 def format_local_dt(dt: Optional[datetime], tz_name: str) -> str:
     if not dt:
         return ""
-    # Example: 2025-10-26 15:45 EDT
-    return dt.strftime("%Y-%m-%d %H:%M ") + dt.tzname()
+    # Example: 2025-10-26 15:45 EDT (integer fields, no strftime)
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d} " + dt.tzname()
+
+_MONTH_ABBR = ("", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+# "1st" .. "31st", indexed by day of month (11th-13th take "th")
+_DAY_ORDINALS = ("",) + tuple(
+    f"{day}{'th' if 11 <= day <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')}"
+    for day in range(1, 32)
+)
 
 def month_day_ordinal(d: date) -> str:
     # Example: Aug 3rd
-    suffix = "th"
-    if 11 <= d.day <= 13:
-        suffix = "th"
-    else:
-        suffix = {1: "st", 2: "nd", 3: "rd"}.get(d.day % 10, "th")
-    return d.strftime("%b ") + f"{d.day}{suffix}"
+    return f"{_MONTH_ABBR[d.month]} {_DAY_ORDINALS[d.day]}"
 
 
 # -----------------------------
@@ -141,42 +274,74 @@ def month_day_ordinal(d: date) -> str:
 
 def ics_escape(text: str) -> str:
     # Escape \, ; , , and newlines.
+    # Chained str.replace: each is a C-level scan that returns the string itself
+    # when there is nothing to replace. (str.translate with multi-character
+    # replacements falls back to a per-character loop and is far slower here.)
     text = text.replace("\\", "\\\\")
     text = text.replace(";", r"\;").replace(",", r"\,")
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = text.replace("\n", r"\n")
-    return text
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.replace("\n", r"\n")
+
+@lru_cache(maxsize=2048)
+def ics_escape_cached(text: str) -> str:
+    # For short values that recur across events (summaries, locations, URL);
+    # DESCRIPTION bodies are nearly always unique, so they skip the cache.
+    return ics_escape(text)
 
 def fold_ics_line(line: str, limit: int = 75) -> List[str]:
     """
     Fold to 75 octets; we approximate with UTF-8 bytes slicing.
     Continuation lines start with a single space.
     """
+    if line.isascii():
+        # 1 char == 1 octet: slice the str directly
+        if len(line) <= limit:
+            return [line]
+        out = [line[:limit]]
+        out.extend(" " + line[i : i + limit - 1] for i in range(limit, len(line), limit - 1))
+        return out
+
     b = line.encode("utf-8")
-    if len(b) <= limit:
+    n = len(b)
+    if n <= limit:
         return [line]
 
-    out: List[str] = []
+    out = []
     start = 0
     first = True
-    while start < len(b):
-        chunk = b[start : start + limit]
-        # decode chunk safely by backing off if we split a multibyte char
-        while True:
-            try:
-                s = chunk.decode("utf-8")
-                break
-            except UnicodeDecodeError:
-                chunk = chunk[:-1]
+    while start < n:
+        end = min(start + limit, n)
+        # back off so we never split a multibyte char (skip continuation bytes)
+        while end < n and (b[end] & 0xC0) == 0x80:
+            end -= 1
+        s = b[start:end].decode("utf-8")
         if first:
             out.append(s)
             first = False
         else:
             out.append(" " + s)
-        start += len(chunk)
+        start = end
         limit = 74  # continuation lines include leading space, so 74 bytes payload
     return out
 
+def fold_ics_text(text: str) -> str:
+    """
+    Fold every long content line of an already CRLF-joined ICS body.
+    Most lines are short ASCII and are passed through as-is.
+    """
+    out: List[str] = []
+    for line in text.split("\r\n"):
+        if not line.isascii():
+            out.extend(fold_ics_line(line))
+        elif len(line) <= 75:
+            out.append(line)
+        else:
+            # Same chunks as fold_ics_line, but the continuation space rides on the
+            # separator instead of being concatenated onto every chunk
+            out.append("\r\n ".join([line[:75], *(line[i : i + 74] for i in range(75, len(line), 74))]))
+    return "\r\n".join(out)
+
 def vtimezone_america_new_york() -> List[str]:
     """
     Minimal VTIMEZONE for America/New_York (works for most clients).
@@ -203,8 +368,58 @@ def vtimezone_america_new_york() -> List[str]:
     ]
 
 def dt_local_ics(dt: datetime) -> str:
-    # Floating local with TZID: YYYYMMDDTHHMMSS
-    return dt.strftime("%Y%m%dT%H%M%S")
+    # Floating local with TZID: YYYYMMDDTHHMMSS (integer fields, no strftime)
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
+def ics_date(d: date) -> str:
+    # YYYYMMDD, for VALUE=DATE properties
+    return f"{d.year:04d}{d.month:02d}{d.day:02d}"
+
+def ics_dtstamp(now_utc: datetime) -> str:
+    # DTSTAMP only needs to say when the calendar was produced, so main() takes
+    # one value per run and passes it to every event
+    return now_utc.strftime("%Y%m%dT%H%M%SZ")
+
+def ics_vevent(uid: str, body_lines: List[str], dtstamp: str) -> List[str]:
+    """
+    Wrap already-rendered property lines in BEGIN/END:VEVENT with UID + DTSTAMP.
+    """
+    return [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{dtstamp}",
+        *body_lines,
+        "END:VEVENT",
+    ]
+
+def ics_vevent_block(uid: str, body: str, dtstamp: str) -> str:
+    """
+    ics_vevent() as one CRLF-joined block, for a body whose lines are already
+    CRLF-joined (e.g. shared by every calendar that carries the event).
+    """
+    return f"BEGIN:VEVENT\r\nUID:{uid}\r\nDTSTAMP:{dtstamp}\r\n{body}\r\nEND:VEVENT"
+
+def ics_event_fixed_lines(
+    dtstart_local: Optional[datetime],
+    dtend_local: Optional[datetime],
+    tz_name: str,
+    location: str = "",
+    url: str = "",
+) -> List[str]:
+    """
+    DTSTART/DTEND/LOCATION/URL lines. These depend only on the game, so callers
+    rendering one game into several calendars can build them once and pass
+    them to ics_event(fixed_lines=...).
+    """
+    has_times = bool(dtstart_local and dtend_local)
+    # Optional properties are (name, value, present) triples, emitted in order
+    props: Tuple[Tuple[str, str, bool], ...] = (
+        (f"DTSTART;TZID={tz_name}", dt_local_ics(dtstart_local) if has_times else "", has_times),
+        (f"DTEND;TZID={tz_name}", dt_local_ics(dtend_local) if has_times else "", has_times),
+        ("LOCATION", ics_escape_cached(location), bool(location)),
+        ("URL", ics_escape_cached(url), bool(url)),
+    )
+    return [f"{name}:{value}" for name, value, present in props if present]
 
 def ics_event(
     uid: str,
@@ -212,72 +427,55 @@ def ics_event(
     dtstart_local: Optional[datetime],
     dtend_local: Optional[datetime],
     tz_name: str,
-    description_lines: List[str],
+    description_lines: Sequence[str],
+    dtstamp: str,
     location: str = "",
     url: str = "",
+    fixed_lines: Optional[List[str]] = None,
 ) -> List[str]:
-    lines: List[str] = ["BEGIN:VEVENT"]
-    lines.append(f"UID:{uid}")
-    lines.append(f"DTSTAMP:{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}")
-    lines.append(f"SUMMARY:{ics_escape(summary)}")
-
-    if dtstart_local and dtend_local:
-        lines.append(f"DTSTART;TZID={tz_name}:{dt_local_ics(dtstart_local)}")
-        lines.append(f"DTEND;TZID={tz_name}:{dt_local_ics(dtend_local)}")
-
-    if location:
-        lines.append(f"LOCATION:{ics_escape(location)}")
-
-    if url:
-        lines.append(f"URL:{ics_escape(url)}")
-
+    if fixed_lines is None:
+        fixed_lines = ics_event_fixed_lines(dtstart_local, dtend_local, tz_name, location, url)
     desc = "\n".join(description_lines).strip()
-    lines.append(f"DESCRIPTION:{ics_escape(desc)}")
+    return ics_vevent(uid, [f"SUMMARY:{ics_escape_cached(summary)}", *fixed_lines, f"DESCRIPTION:{ics_escape(desc)}"], dtstamp)
 
-    lines.append("END:VEVENT")
-
-    folded: List[str] = []
-    for ln in lines:
-        folded.extend(fold_ics_line(ln))
-    return folded
-
-def ics_allday_event(uid: str, summary: str, day_local: date, description_lines: List[str]) -> List[str]:
-    start_date = day_local.strftime("%Y%m%d")
-    end_date = (day_local + timedelta(days=1)).strftime("%Y%m%d")
+def ics_allday_event_fixed_lines(summary: str, day_local: date, description_lines: Sequence[str]) -> List[str]:
+    """
+    SUMMARY/DTSTART/DTEND/DESCRIPTION lines of an all-day event. Identical for
+    every calendar the day appears in, so callers can render them once.
+    """
+    start_date = ics_date(day_local)
+    end_date = ics_date(day_local + timedelta(days=1))
 
     desc_text = "\n".join(description_lines).strip()
 
-    lines = [
-        "BEGIN:VEVENT",
-        f"UID:{uid}",
-        f"DTSTAMP:{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}",
-        f"SUMMARY:{ics_escape(summary)}",
+    return [
+        f"SUMMARY:{ics_escape_cached(summary)}",
         f"DTSTART;VALUE=DATE:{start_date}",
         f"DTEND;VALUE=DATE:{end_date}",
         f"DESCRIPTION:{ics_escape(desc_text)}",
-        "END:VEVENT",
     ]
-    folded: List[str] = []
-    for ln in lines:
-        folded.extend(fold_ics_line(ln))
-    return folded
 
 def ics_calendar(calname: str, events_lines: List[str], tz_name: str) -> str:
-    lines: List[str] = []
-    lines.append("BEGIN:VCALENDAR")
-    lines.append("VERSION:2.0")
-    lines.append("PRODID:-//btsh-ics//EN")
-    lines.append("CALSCALE:GREGORIAN")
-    lines.append("METHOD:PUBLISH")
-    lines.append(f"X-WR-CALNAME:{ics_escape(calname)}")
-    lines.append(f"X-WR-TIMEZONE:{tz_name}")
-    lines.extend(vtimezone_america_new_york())
-
-    lines.extend(events_lines)
-    lines.append("END:VCALENDAR")
+    """
+    `events_lines` may hold individual content lines or whole CRLF-joined
+    VEVENT blocks; either way they are joined with CRLF and folded here.
+    """
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//btsh-ics//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{ics_escape(calname)}",
+        f"X-WR-TIMEZONE:{tz_name}",
+        *vtimezone_america_new_york(),
+        *events_lines,
+        "END:VCALENDAR",
+        "",  # the join then ends the file with CRLF, without another full-size concat
+    ]
 
-    # Use CRLF per spec
-    return "\r\n".join(lines) + "\r\n"
+    # Use CRLF per spec; long lines are folded in a single pass over the body
+    return fold_ics_text("\r\n".join(lines))
 
 
 # -----------------------------
@@ -292,16 +490,31 @@ def title_case(s: str) -> str:
     # Used only for headings like "TEAM GAMES-TO-DATE"
     return s.upper()
 
+_SLUG_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
 def slugify(s: str) -> str:
-    s = s.strip().lower()
-    s = re.sub(r"[^a-z0-9]+", "-", s)
-    s = re.sub(r"-+", "-", s).strip("-")
+    # runs of non-alnum (dashes and surrounding whitespace included) collapse to
+    # one "-" and the edges are trimmed, so no second pass or strip() is needed
+    s = _SLUG_NON_ALNUM_RE.sub("-", s.lower()).strip("-")
     return s or "team"
 
-def stable_uid(*parts: str) -> str:
-    raw = "|".join(parts).encode("utf-8")
-    h = hashlib.sha1(raw).hexdigest()
-    return f"{h}@btsh-ics"
+# UIDs must never change for an existing event: calendar clients key on them,
+# so a new scheme would duplicate every event for current subscribers. Keep
+# the SHA-1 form.
+def stable_uid_factory(*prefix_parts: str) -> Callable[[str], str]:
+    """
+    Returns uid(last) == sha1("|".join((*prefix_parts, last))) + "@btsh-ics".
+    The shared prefix is hashed once and each UID only clones that state and
+    hashes its last part.
+    """
+    clone = hashlib.sha1(("|".join(prefix_parts) + "|").encode("utf-8")).copy
+
+    def uid(last: str) -> str:
+        h = clone()
+        h.update(last.encode("utf-8"))
+        return h.hexdigest() + "@btsh-ics"
+
+    return uid
 
 def pick_division(team: TeamInfo, fmt: str) -> str:
     return team.division_short if fmt == "short" else team.division_name
@@ -312,10 +525,10 @@ def pick_division(team: TeamInfo, fmt: str) -> str:
 # -----------------------------
 
 def is_completed_game(g: GameRef) -> bool:
-    return (g.status or "").lower() == "completed" and g.away_score is not None and g.home_score is not None
+    return g.status_norm == "completed" and g.away_score is not None and g.home_score is not None
 
 def is_cancelled_game(g: GameRef) -> bool:
-    return (g.status or "").lower() == "cancelled"
+    return g.status_norm == "cancelled"
 
 def game_has_known_teams(g: GameRef) -> bool:
     return g.away_team_name not in ("-", "TBD", "") and g.home_team_name not in ("-", "TBD", "")
@@ -333,27 +546,19 @@ def team_is_home(team_id: int, g: GameRef) -> bool:
 def team_is_away(team_id: int, g: GameRef) -> bool:
     return g.away_team_id == team_id
 
-def is_team_in_game(team_id: int, g: GameRef) -> bool:
-    return g.home_team_id == team_id or g.away_team_id == team_id
-
 def compare_scores_for_team(team_id: int, g: GameRef) -> Optional[str]:
     """
     Returns 'W'/'L' for a completed game from the perspective of team_id.
     """
-    if not is_completed_game(g):
-        return None
-    assert g.away_score is not None and g.home_score is not None
     if g.home_team_id == team_id:
-        return "W" if g.home_score > g.away_score else "L"
+        return g.home_wl
     if g.away_team_id == team_id:
-        return "W" if g.away_score > g.home_score else "L"
+        return g.away_wl
     return None
 
 def result_suffix(g: GameRef) -> str:
     # For description lines: add OT/SO markers when completed
-    if not g.result:
-        return ""
-    r = g.result.lower()
+    r = g.result_norm
     if "final_ot" in r:
         return " OT"
     if "final_so" in r:
@@ -397,45 +602,138 @@ def format_game_line_for_team(team_id: int, g: GameRef, opponent_name_override:
     # Completed with score => include W/L + score (+ OT/SO)
     if is_completed_game(g):
         wl = compare_scores_for_team(team_id, g) or ""
-        if team_is_home(team_id, g):
-            sc = score_home_away(g) or ""
-        else:
-            sc = score_away_home(g) or ""
+        sc = (score_home_away(g) if is_home else score_away_home(g)) or ""
         suf = result_suffix(g)
         return f"    {md} {marker} {opp_name} ({wl} {sc}{suf})"
 
     # Scheduled / unknown result
     return f"    {md} {marker} {opp_name}"
 
-def compute_record_to_date(team_id: int, games: List[GameRef], before_dt: datetime) -> Tuple[int, int, int, int]:
+def index_games_by_team(games: List[GameRef]) -> Dict[int, List[GameRef]]:
     """
-    Returns (wins, losses, ot_wins, so_wins) for completed games before before_dt.
-    Also returns losses total; OT/SO breakdown is on WINS only here for display.
+    Map team_id -> that team's games, in the same (chronological) order as `games`.
     """
-    w = l = otw = sow = 0
+    by_team: Dict[int, List[GameRef]] = {}
     for g in games:
-        if not is_team_in_game(team_id, g):
-            continue
-        if not g.start_local or g.start_local >= before_dt:
-            continue
-        if not is_completed_game(g):
+        if g.home_team_id is not None:
+            by_team.setdefault(g.home_team_id, []).append(g)
+        if g.away_team_id is not None and g.away_team_id != g.home_team_id:
+            by_team.setdefault(g.away_team_id, []).append(g)
+    return by_team
+
+def build_team_timelines(games: List[GameRef]) -> Dict[int, Tuple[List[GameRef], List[float]]]:
+    """
+    Map team_id -> (that team's games with a known start, their sort_ts), both in
+    chronological order, so "games before X" is a bisect instead of a full scan.
+    """
+    by_team = index_games_by_team([g for g in games if g.start_local])
+    return {tid: (tg, [g.sort_ts for g in tg]) for tid, tg in by_team.items()}
+
+def build_matchup_timelines(games: List[GameRef]) -> Dict[Tuple[int, str], Tuple[List[GameRef], List[float]]]:
+    """
+    Map (team_id, team name) -> games with a known start where team_id played
+    and either side was listed under that name, plus their sort_ts. Keyed by
+    name rather than opponent id so placeholder opponents ("TBD") match the
+    same way the head-to-head section always has.
+    """
+    by_key: Dict[Tuple[int, str], List[GameRef]] = {}
+    for g in games:
+        if not g.start_local:
             continue
-        wl = compare_scores_for_team(team_id, g)
-        if wl == "W":
-            w += 1
-            if (g.result or "").lower() == "final_ot":
-                otw += 1
-            elif (g.result or "").lower() == "final_so":
-                sow += 1
-        elif wl == "L":
-            l += 1
-    return w, l, otw, sow
+        home_id, away_id = g.home_team_id, g.away_team_id
+        home_name, away_name = g.home_team_name, g.away_team_name
+        same_name = home_name == away_name
+        for tid in (home_id, away_id):
+            if tid is None:
+                continue
+            by_key.setdefault((tid, home_name), []).append(g)
+            if not same_name:
+                by_key.setdefault((tid, away_name), []).append(g)
+            if home_id == away_id:
+                break
+    return {key: (kg, [g.sort_ts for g in kg]) for key, kg in by_key.items()}
+
+def count_games_before(
+    timelines: Dict[Any, Tuple[List[GameRef], List[float]]],
+    key: Any,
+    before_ts: float,
+) -> Tuple[List[GameRef], int]:
+    """
+    Returns (timeline games under `key`, how many of them start strictly
+    before the `before_ts` timestamp). Callers slice only the part they need.
+    """
+    entry = timelines.get(key)
+    if entry is None:
+        return [], 0
+    team_games, starts = entry
+    return team_games, bisect.bisect_left(starts, before_ts)
+
+def games_before(
+    timelines: Dict[Any, Tuple[List[GameRef], List[float]]],
+    key: Any,
+    before_ts: float,
+) -> List[GameRef]:
+    """
+    Games under `key` (a team_id, or a matchup key) starting strictly before
+    the `before_ts` timestamp, oldest first.
+    """
+    team_games, n = count_games_before(timelines, key, before_ts)
+    return team_games[:n]
+
+def build_timeline_lines(
+    timelines: Dict[int, Tuple[List[GameRef], List[float]]],
+) -> Dict[int, List[str]]:
+    """
+    team_id -> format_game_line_for_team() of each game in the team's timeline,
+    from that team's perspective. A team's history shows up in the description
+    of every later game against it, so each line is rendered once here and the
+    descriptions slice the same prefix the bisect picks out of the timeline.
+    """
+    return {
+        tid: [format_game_line_for_team(tid, g).rstrip() for g in team_games]
+        for tid, (team_games, _) in timelines.items()
+    }
+
+def build_record_prefixes(
+    timelines: Dict[int, Tuple[List[GameRef], List[float]]],
+) -> Dict[int, List[Tuple[int, int, int, int]]]:
+    """
+    team_id -> running (wins, losses, ot_wins, so_wins) over the team's timeline:
+    entry i is the record (completed games only) after its first i games, i.e.
+    the record before any cutoff that count_games_before() resolves to i games.
+    """
+    prefixes: Dict[int, List[Tuple[int, int, int, int]]] = {}
+    for tid, (team_games, _) in timelines.items():
+        w = l = otw = sow = 0
+        running = [(0, 0, 0, 0)]
+        for g in team_games:
+            wl = compare_scores_for_team(tid, g)  # None unless completed
+            if wl == "W":
+                w += 1
+                if g.result_norm == "final_ot":
+                    otw += 1
+                elif g.result_norm == "final_so":
+                    sow += 1
+            elif wl == "L":
+                l += 1
+            running.append((w, l, otw, sow))
+        prefixes[tid] = running
+    return prefixes
 
 
 # -----------------------------
 # Parsing BTSH payloads
 # -----------------------------
 
+def clean_str(value: Any) -> str:
+    """
+    Same result as str(value or "").strip(), without the str() round-trip for
+    values JSON already decoded as str (the common case).
+    """
+    if isinstance(value, str):
+        return value.strip()
+    return str(value).strip() if value else ""
+
 def season_id_for_year(seasons_payload: Dict[str, Any], year: int) -> int:
     for s in seasons_payload.get("results", []):
         if int(s.get("year")) == int(year):
@@ -448,14 +746,26 @@ def parse_team_infos(team_regs_payload: Dict[str, Any]) -> Dict[int, TeamInfo]:
         t = r.get("team") or {}
         d = r.get("division") or {}
         tid = int(t["id"])
+        name = clean_str(t.get("name"))
         teams[tid] = TeamInfo(
             team_id=tid,
-            name=str(t.get("name") or "").strip(),
-            division_name=str(d.get("name") or "").strip(),
-            division_short=str(d.get("short_name") or "").strip(),
+            name=name,
+            division_name=clean_str(d.get("name")),
+            division_short=clean_str(d.get("short_name")),
+            slug=slugify(name),
         )
     return teams
 
+def parse_non_game_day(day_obj: Dict[str, Any]) -> NonGameDay:
+    day_type = clean_str(day_obj.get("type"))
+    return NonGameDay(
+        day_id=str(day_obj.get("id")),
+        day_type=day_type,
+        title=clean_str(day_obj.get("get_type_display") or day_type),
+        day_date=parse_day_yyyy_mm_dd(str(day_obj.get("day"))),
+        description=(day_obj.get("description") or "").strip(),
+    )
+
 def normalize_game_days(
     game_days_payload: Dict[str, Any],
     season_year: int,
@@ -472,8 +782,8 @@ def normalize_game_days(
 
     for day_obj in game_days_payload.get("results", []):
         day_id = int(day_obj["id"])
-        day_type = str(day_obj.get("type") or "").strip()
-        day_type_display = str(day_obj.get("get_type_display") or day_type).strip()
+        day_type = clean_str(day_obj.get("type"))
+        day_type_display = clean_str(day_obj.get("get_type_display") or day_type)
         day_date = parse_day_yyyy_mm_dd(str(day_obj.get("day")))
         day_desc = (day_obj.get("description") or "").strip()
 
@@ -492,7 +802,8 @@ def normalize_game_days(
 
         for g in day_obj.get("games", []) or []:
             game_id = int(g["id"])
-            status = str(g.get("status") or "").strip()
+            status = clean_str(g.get("status"))
+            status_norm = status.lower()
 
             # times are "HH:MM:SS"
             start_t = parse_hh_mm_ss(g.get("start"))
@@ -513,6 +824,13 @@ def normalize_game_days(
             away_score = int(away_score) if away_score is not None else None
 
             result = g.get("result")
+            result = clean_str(result) if result is not None else None
+
+            # W/L per side, resolved once (same rules as is_completed_game)
+            home_wl = away_wl = None
+            if status_norm == "completed" and home_score is not None and away_score is not None:
+                home_wl = "W" if home_score > away_score else "L"
+                away_wl = "W" if away_score > home_score else "L"
 
             # Some payloads might include location/court at game level; fall back to day
             gloc = (g.get("location") or location).strip()
@@ -520,6 +838,8 @@ def normalize_game_days(
 
             is_placeholder = (home_team_name in ("-", "TBD", "")) or (away_team_name in ("-", "TBD", ""))
 
+            sort_dt = start_local or datetime.combine(day_date, time(), tzinfo=tz)
+
             games.append(
                 GameRef(
                     game_id=game_id,
@@ -533,23 +853,28 @@ def normalize_game_days(
                     location=gloc,
                     court=gcourt,
                     status=status,
+                    status_norm=status_norm,
                     start_local=start_local,
                     end_local=end_local,
                     home_team_id=home_team_id,
-                    home_team_name=str(home_team_name).strip(),
+                    home_team_name=clean_str(home_team_name),
                     away_team_id=away_team_id,
-                    away_team_name=str(away_team_name).strip(),
+                    away_team_name=clean_str(away_team_name),
                     home_score=home_score,
                     away_score=away_score,
-                    result=str(result).strip() if result is not None else None,
+                    result=result,
+                    result_norm=(result or "").lower(),
+                    home_wl=home_wl,
+                    away_wl=away_wl,
                     opening_team_id=opening_team_id,
                     closing_team_id=closing_team_id,
                     is_placeholder=is_placeholder,
+                    sort_ts=sort_dt.timestamp(),
                 )
             )
 
     # Sort by start time if available, else by date
-    games.sort(key=lambda x: (x.start_local or datetime(x.day_date.year, x.day_date.month, x.day_date.day, tzinfo=tz), x.game_id))
+    games.sort(key=lambda x: (x.sort_ts, x.game_id))
     return games, non_game_days
 
 
@@ -557,6 +882,45 @@ def normalize_game_days(
 # Event building
 # -----------------------------
 
+def game_location(g: GameRef) -> str:
+    """
+    LOCATION value: "Tompkins Square Park (West)", or just the location.
+    """
+    if g.location and g.court:
+        return f"{g.location} ({g.court})"
+    return g.location
+
+def game_rink(g: GameRef) -> str:
+    """
+    "Rink:" description value; like game_location but falls back to the court alone.
+    """
+    return game_location(g) or g.court
+
+def checkin_footer(cfg: Dict[str, Any]) -> Tuple[str, ...]:
+    """
+    Trailing GAME INFO line(s) shared by every event; build once per run.
+    """
+    checkin_label = cfg.get("checkin_label", "Check-in / Standings")
+    checkin_url = cfg.get("checkin_url", "https://btsh.org")
+    return (f"{checkin_label}: {checkin_url}",)
+
+_GAME_INFO_RULE = tuple(ascii_rule("GAME INFO"))
+
+def game_info_lines(g: GameRef, tz_name: str, rink: str, footer: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    GAME INFO description block; depends only on the game, not the calendar.
+    Immutable so one block (and one shared `footer`) can back many events.
+    """
+    return (
+        *_GAME_INFO_RULE,
+        f"Season: {g.season_year}",
+        f"Stage: {g.day_type_display}",
+        f"Status: {g.status}",
+        f"Start ({tz_name}): {format_local_dt(g.start_local, tz_name)}",
+        *((f"Rink: {rink}",) if rink else ()),
+        *footer,
+    )
+
 def build_summary_for_team_calendar(
     team: TeamInfo,
     g: GameRef,
@@ -607,9 +971,9 @@ def build_summary_for_team_calendar(
             sc = score_away_home(g)
         if sc:
             suf = ""
-            if (g.result or "").lower() == "final_ot":
+            if g.result_norm == "final_ot":
                 suf = " (OT)"
-            elif (g.result or "").lower() == "final_so":
+            elif g.result_norm == "final_so":
                 suf = " (SO)"
             summary = f"{summary} [{wl} {sc}{suf}]"
 
@@ -649,9 +1013,9 @@ def build_summary_for_master_calendar(g: GameRef, cfg: Dict[str, Any], team_map:
         sc = score_away_home(g)
         if sc:
             suf = ""
-            if (g.result or "").lower() == "final_ot":
+            if g.result_norm == "final_ot":
                 suf = " (OT)"
-            elif (g.result or "").lower() == "final_so":
+            elif g.result_norm == "final_so":
                 suf = " (SO)"
             summary = f"{summary} [{sc}{suf}]"
 
@@ -664,57 +1028,42 @@ def build_description_for_team_event(
     calendar_team: TeamInfo,
     opponent_name: str,
     g: GameRef,
-    all_games: List[GameRef],
+    timelines: Dict[int, Tuple[List[GameRef], List[float]]],
+    matchups: Dict[Tuple[int, str], Tuple[List[GameRef], List[float]]],
+    records: Dict[int, List[Tuple[int, int, int, int]]],
+    timeline_lines: Dict[int, List[str]],
     cfg: Dict[str, Any],
-    tz_name: str,
+    game_info: Tuple[str, ...],
 ) -> List[str]:
-    checkin_label = cfg.get("checkin_label", "Check-in / Standings")
-    checkin_url = cfg.get("checkin_url", "https://btsh.org")
+    """
+    `timelines` / `matchups` / `records` / `timeline_lines` are
+    build_team_timelines() / build_matchup_timelines() / build_record_prefixes() /
+    build_timeline_lines() over the whole season.
+    `game_info` is the game_info_lines() block for `g`; it is the same for both
+    teams' calendars, so main() renders it once per game.
+    """
     opponent_games_limit = cfg.get("opponent_games_limit", None)
     if isinstance(opponent_games_limit, str) and opponent_games_limit.lower() == "null":
         opponent_games_limit = None
 
-    desc: List[str] = []
-
     # GAME INFO
-    desc.extend(ascii_rule("GAME INFO"))
-    desc.append(f"Season: {calendar_team and g.season_year}")
-    desc.append(f"Stage: {g.day_type_display}")
-    desc.append(f"Status: {g.status}")
-    desc.append(f"Start ({tz_name}): {format_local_dt(g.start_local, tz_name)}")
-    # Location: "Tompkins Square Park (West)" (from your example)
-    loc_parts = [p for p in [g.location, g.court] if p]
-    rink = " - ".join(loc_parts) if loc_parts else ""
-    if g.location and g.court:
-        rink = f"{g.location} ({g.court})"
-    elif g.location:
-        rink = g.location
-    elif g.court:
-        rink = g.court
-    if rink:
-        desc.append(f"Rink: {rink}")
-    desc.append(f"{checkin_label}: {checkin_url}")
-    desc.append("")
+    desc: List[str] = [*game_info, ""]
 
     # HEAD-TO-HEAD
     desc.extend(ascii_rule(f"HEAD-TO-HEAD vs {opponent_name}"))
-    prior_h2h = []
+    # For games with a start time sort_ts is exactly start_local.timestamp()
+    prior_h2h: List[GameRef] = []
     if g.start_local:
-        for gg in all_games:
-            if not gg.start_local or gg.start_local >= g.start_local:
-                continue
-            # both teams involved
-            if is_team_in_game(calendar_team.team_id, gg) and (
-                (gg.home_team_name == opponent_name) or (gg.away_team_name == opponent_name)
-            ):
-                prior_h2h.append(gg)
+        prior_h2h = games_before(matchups, (calendar_team.team_id, opponent_name), g.sort_ts)
 
     if not prior_h2h:
         desc.append("    (no prior matchups listed)")
     else:
-        for gg in prior_h2h:
-            # format from calendar_team perspective, but opponent name already known
-            desc.append(format_game_line_for_team(calendar_team.team_id, gg, opponent_name_override=opponent_name).rstrip())
+        # format from calendar_team perspective, but opponent name already known
+        team_id = calendar_team.team_id
+        desc.extend(
+            format_game_line_for_team(team_id, gg, opponent_name_override=opponent_name).rstrip() for gg in prior_h2h
+        )
 
     desc.append("")
 
@@ -728,18 +1077,15 @@ def build_description_for_team_event(
     elif g.away_team_id == calendar_team.team_id:
         opp_id = g.home_team_id
 
-    # Build list of opponent prior games (prior to event start; within season)
-    opp_prior: List[GameRef] = []
+    # Opponent prior games (prior to event start; within season): the first
+    # n_prior games of the opponent's timeline, sliced below once the limit is known
+    n_prior = 0
     if g.start_local and opp_id is not None:
-        for gg in all_games:
-            if not gg.start_local or gg.start_local >= g.start_local:
-                continue
-            if is_team_in_game(opp_id, gg):
-                opp_prior.append(gg)
+        _, n_prior = count_games_before(timelines, opp_id, g.sort_ts)
 
     # Record to date (completed games only) BEFORE event
     if g.start_local and opp_id is not None:
-        w, l, otw, sow = compute_record_to_date(opp_id, all_games, g.start_local)
+        w, l, otw, sow = records[opp_id][n_prior] if opp_id in records else (0, 0, 0, 0)
         record_str = f"{w}-{l}"
         # Include OT/SO win breakdown since you asked to distinguish these
         extra = []
@@ -757,15 +1103,14 @@ def build_description_for_team_event(
             opponent_games_limit = None
 
     # If limit set, keep most recent prior games (still before event start)
+    first = 0
     if opponent_games_limit is not None and opponent_games_limit > 0:
-        opp_prior = opp_prior[-opponent_games_limit:]
-
-    if not opp_prior:
+        first = max(0, n_prior - opponent_games_limit)
+    if first >= n_prior:
         desc.append("    (no prior games listed)")
     else:
-        for gg in opp_prior:
-            # Format from opponent perspective so W/L makes sense for them
-            desc.append(format_game_line_for_team(opp_id, gg).rstrip())
+        # Already formatted from the opponent's perspective, so W/L makes sense for them
+        desc.extend(timeline_lines[opp_id][first:n_prior])
 
     return desc
 
@@ -776,7 +1121,7 @@ def build_description_for_team_event(
 
 def load_config(path: str = "config.yml") -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
+        cfg = yaml.load(f, Loader=YamlSafeLoader) or {}
     # Basic required keys
     if "season_year" not in cfg:
         raise RuntimeError("config.yml missing required key: season_year")
@@ -786,15 +1131,200 @@ def load_config(path: str = "config.yml") -> Dict[str, Any]:
         cfg["default_timezone"] = "America/New_York"
     return cfg
 
+def write_bytes(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Unbuffered single write through a raw file descriptor. O_BINARY keeps
+    # Windows from translating LF to CRLF (the CRLF output would gain extra CRs);
+    # 0o666 leaves the final mode to the umask, like open() does.
+    view = memoryview(data)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
 def write_text(path: str, content: str) -> None:
+    write_bytes(path, content.encode("utf-8"))
+
+def write_bytes_atomic(path: str, data: bytes) -> None:
+    # Write beside the target, then rename over it: readers see the old file or the new one
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write_bytes(tmp_path, data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_files(files: Iterable[Tuple[str, bytes]], max_workers: int = 8) -> None:
+    """
+    Write (path, data) pairs concurrently so file I/O overlaps instead of
+    running serially after each calendar is built. `files` may be lazy: each
+    write is queued as soon as its pair is produced.
+    Two pairs can share a path (team names that slugify alike); the later write
+    waits for the earlier one, so the last pair wins as with sequential writes
+    instead of the two interleaving into one corrupt file.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        pending: Dict[str, Future] = {}
+        for path, data in files:
+            earlier = pending.get(path)
+            if earlier is not None:
+                earlier.result()
+            pending[path] = ex.submit(write_bytes, path, data)
+        # Propagates the first write error, if any
+        for fut in pending.values():
+            fut.result()
+
+def write_tar_archive(path: str, files: Iterable[Tuple[str, bytes]], mtime: float) -> None:
+    """
+    Write (member_name, data) pairs into a single uncompressed tar at `path`
+    with one open/close instead of one file per calendar. Every member gets
+    `mtime` (a POSIX timestamp) as its modification time.
+    """
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8", newline="") as f:
-        f.write(content)
+    with tarfile.open(path, "w") as tar:
+        for name, data in files:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = mtime
+            tar.addfile(info, io.BytesIO(data))
+
+@dataclass(frozen=True)
+class TeamCalendarContext:
+    """Read-only inputs shared by every team calendar (shipped once to each worker)."""
+    cfg: Dict[str, Any]
+    tz_name: str
+    season_year: int
+    season_id: int
+    team_file_prefix: str
+    team_map: Dict[int, TeamInfo]
+    timelines: Dict[int, Tuple[List[GameRef], List[float]]]
+    matchups: Dict[Tuple[int, str], Tuple[List[GameRef], List[float]]]
+    records: Dict[int, List[Tuple[int, int, int, int]]]
+    timeline_lines: Dict[int, List[str]]
+    games_by_team: Dict[int, List[GameRef]]
+    team_game_render: Dict[int, Tuple[List[str], Tuple[str, ...]]]
+    team_day_events: List[Tuple[str, str]]  # (day_id, CRLF-joined body)
+    dtstamp: str
+
+def render_team_calendar(team: TeamInfo, ctx: TeamCalendarContext) -> Tuple[str, bytes]:
+    """
+    Returns (file_name, UTF-8 ics_content) for one team calendar.
+    Each event is kept as one CRLF-joined block rather than a list of lines,
+    and the calendar is encoded here so pool workers also do that part.
+    """
+    team_id = team.team_id
+    team_events: List[str] = []
+    # UID prefixes are constant for the whole calendar
+    team_str = str(team_id)
+    season_str = str(ctx.season_id)
+    game_uid = stable_uid_factory("team", team_str, season_str)
+    day_uid = stable_uid_factory("team-day", team_str, season_str)
+
+    # Team games
+    for g in ctx.games_by_team.get(team_id, []):
+        # Determine opponent name (even if placeholder)
+        if g.home_team_id == team_id:
+            opp_name = g.away_team_name
+        else:
+            opp_name = g.home_team_name
+
+        summary = build_summary_for_team_calendar(team, g, ctx.cfg, ctx.team_map)
+
+        fixed_lines, game_info = ctx.team_game_render[g.game_id]
+
+        desc_lines = build_description_for_team_event(
+            calendar_team=team,
+            opponent_name=opp_name,
+            g=g,
+            timelines=ctx.timelines,
+            matchups=ctx.matchups,
+            records=ctx.records,
+            timeline_lines=ctx.timeline_lines,
+            cfg=ctx.cfg,
+            game_info=game_info,
+        )
+
+        uid = game_uid(str(g.game_id))
+        ev_lines = ics_event(
+            uid=uid,
+            summary=summary,
+            dtstart_local=g.start_local,
+            dtend_local=g.end_local,
+            tz_name=ctx.tz_name,
+            description_lines=desc_lines,
+            fixed_lines=fixed_lines,
+            dtstamp=ctx.dtstamp,
+        )
+        team_events.append("\r\n".join(ev_lines))
+
+    # Team non-game days (all-day); only the UID differs between teams
+    for day_id, day_body in ctx.team_day_events:
+        team_events.append(ics_vevent_block(day_uid(day_id), day_body, ctx.dtstamp))
+
+    calname = f"BTSH {team.name} ({ctx.season_year})"
+    content = ics_calendar(calname, team_events, ctx.tz_name).encode("utf-8")
+
+    filename = f"{ctx.team_file_prefix}-{team.slug}-season-{ctx.season_year}.ics"
+    return filename, content
+
+def usable_cpu_count() -> int:
+    """
+    CPUs this process may actually run on. Respects CPU affinity (e.g. a CI
+    runner or container pinned to fewer cores than the host has) where supported.
+    """
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:  # pragma: no cover - not available on macOS/Windows
+        return os.cpu_count() or 1
+
+# Per-process context for render_team_calendars' worker pool
+_WORKER_CTX: Optional[TeamCalendarContext] = None
+
+def _init_team_worker(ctx: TeamCalendarContext) -> None:
+    global _WORKER_CTX
+    _WORKER_CTX = ctx
+
+def _render_team_in_worker(team: TeamInfo) -> Tuple[str, bytes]:
+    assert _WORKER_CTX is not None
+    return render_team_calendar(team, _WORKER_CTX)
+
+def render_team_calendars(teams: List[TeamInfo], ctx: TeamCalendarContext, workers: int) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield every team calendar, in `teams` order, as soon as it is rendered so
+    the caller can start writing it while the rest are still being built.
+    Calendars are independent, so with workers > 1 they are built in a process
+    pool (bypassing the GIL); the shared context is sent to each worker once via
+    the pool initializer.
+
+    The pool never uses "fork": the caller is usually already writing files from
+    threads when it starts, and forking a multi-threaded process can deadlock.
+    """
+    if workers <= 1 or len(teams) <= 1:
+        for team in teams:
+            yield render_team_calendar(team, ctx)
+        return
+    workers = min(workers, len(teams))
+    chunksize = max(1, len(teams) // (4 * workers))
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_team_worker,
+        initargs=(ctx,),
+    ) as ex:
+        yield from ex.map(_render_team_in_worker, teams, chunksize=chunksize)
 
 def main() -> None:
     cfg = load_config("config.yml")
 
-    tz_name = str(cfg["default_timezone"])
+    # Interned: these recur in every event line / UID built below
+    tz_name = sys.intern(str(cfg["default_timezone"]))
     tz = ZoneInfo(tz_name)
 
     season_year = int(cfg["season_year"])
@@ -805,29 +1335,45 @@ def main() -> None:
     include_placeholders = bool(cfg.get("include_placeholders", True))
     include_cancelled_games = bool(cfg.get("include_cancelled_games", True))
 
-    team_day_types = set([str(x).strip() for x in (cfg.get("team_calendar_day_types") or [])])
-    master_day_types = set([str(x).strip() for x in (cfg.get("master_calendar_day_types") or [])])
+    # Normalized once here; the per-game filters only do a membership test
+    team_day_types = frozenset(str(x).strip() for x in (cfg.get("team_calendar_day_types") or []))
+    master_day_types = frozenset(str(x).strip() for x in (cfg.get("master_calendar_day_types") or []))
 
     include_non_game_days = bool(cfg.get("include_non_game_days_as_all_day_events", True))
 
     out_dir = str(cfg["output_dir"])
     team_file_prefix = str(cfg.get("team_file_prefix", "btsh"))
     master_name_tmpl = str(cfg.get("master_file_name_template", "btsh-all-games-season-{year}.ics"))
+    # Optional: bundle all team calendars into one tar instead of one file each
+    team_archive_tmpl = cfg.get("team_calendars_archive")
+    # Worker processes for team calendars: null/1 => in-process (opt-in pool),
+    # never more than the CPUs this process may run on
+    workers = cfg.get("team_calendar_workers")
+    workers = min(int(workers), usable_cpu_count()) if workers is not None else 1
+    # Optional: keep API responses here and revalidate them with conditional GETs
+    # (or, within http_cache_ttl_seconds of the last fetch, reuse them outright)
+    http_cache_dir = cfg.get("http_cache_dir")
+    http_cache_ttl = float(cfg.get("http_cache_ttl_seconds") or 0)
 
     # 1) Seasons: find season id by year
-    seasons_payload = fetch_json(seasons_api_url)
+    seasons_payload = fetch_json(seasons_api_url, cache_dir=http_cache_dir, cache_ttl=http_cache_ttl)
     season_id = season_id_for_year(seasons_payload, season_year)
 
-    # 2) Team registrations (registered teams + divisions)
-    team_regs_payload = fetch_json(team_regs_url_tmpl.format(season_id=season_id))
-    team_map = parse_team_infos(team_regs_payload)
+    # 2) + 3) Team registrations and game days only need season_id, so fetch
+    # them concurrently (over the shared pooled session)
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        fetch = partial(fetch_json, cache_dir=http_cache_dir, cache_ttl=http_cache_ttl)
+        team_regs_future = ex.submit(fetch, team_regs_url_tmpl.format(season_id=season_id))
+        game_days_future = ex.submit(fetch, game_days_url_tmpl.format(season_id=season_id))
 
-    # 3) Game days (source of truth)
-    game_days_payload = fetch_json(game_days_url_tmpl.format(season_id=season_id))
-    games, non_game_days = normalize_game_days(game_days_payload, season_year, season_id, tz)
+        # 2) Team registrations (registered teams + divisions)
+        team_map = parse_team_infos(team_regs_future.result())
+
+        # 3) Game days (source of truth)
+        games, non_game_days = normalize_game_days(game_days_future.result(), season_year, season_id, tz)
 
     # Helper: filter games for a given calendar's allowed day types
-    def calendar_game_filter(g: GameRef, allowed_day_types: set) -> bool:
+    def calendar_game_filter(g: GameRef, allowed_day_types: frozenset) -> bool:
         if g.day_type not in allowed_day_types:
             return False
         if g.is_placeholder and not include_placeholders:
@@ -836,6 +1382,35 @@ def main() -> None:
             return False
         return True
 
+    # The team-calendar filter depends only on the game (team_day_types is shared
+    # by every team), so decide it once per game and index only the survivors.
+    team_calendar_games = [
+        g for g in games if calendar_game_filter(g, team_day_types) and g.start_local and g.end_local
+    ]
+    games_by_team = index_games_by_team(team_calendar_games)
+
+    footer = checkin_footer(cfg)
+
+    event_url = sys.intern(str(cfg.get("checkin_url", "")))
+
+    # The GAME INFO block and the DTSTART/DTEND/LOCATION/URL lines do not depend
+    # on the calendar team, so render them once per game rather than per team.
+    team_game_render: Dict[int, Tuple[List[str], Tuple[str, ...]]] = {
+        g.game_id: (
+            ics_event_fixed_lines(g.start_local, g.end_local, tz_name, game_location(g), event_url),
+            game_info_lines(g, tz_name, game_rink(g), footer),
+        )
+        for g in team_calendar_games
+    }
+
+    season_str = sys.intern(str(season_id))
+    master_game_uid = stable_uid_factory("master", season_str)
+    master_day_uid = stable_uid_factory("master-day", season_str)
+
+    # One DTSTAMP for every event of the run, team calendars included
+    run_time = datetime.now(timezone.utc)
+    dtstamp = ics_dtstamp(run_time)
+
     # Build master calendar events
     master_events: List[str] = []
     for g in games:
@@ -847,23 +1422,19 @@ def main() -> None:
 
         summary = build_summary_for_master_calendar(g, cfg, team_map)
 
-        location = ""
-        if g.location and g.court:
-            location = f"{g.location} ({g.court})"
-        elif g.location:
-            location = g.location
-
-        desc_lines: List[str] = []
-        desc_lines.extend(ascii_rule("GAME INFO"))
-        desc_lines.append(f"Season: {season_year}")
-        desc_lines.append(f"Stage: {g.day_type_display}")
-        desc_lines.append(f"Status: {g.status}")
-        desc_lines.append(f"Start ({tz_name}): {format_local_dt(g.start_local, tz_name)}")
-        if location:
-            desc_lines.append(f"Rink: {location}")
-        desc_lines.append(f"{cfg.get('checkin_label','Check-in / Standings')}: {cfg.get('checkin_url','https://btsh.org')}")
-
-        uid = stable_uid("master", str(season_id), str(g.game_id))
+        location = game_location(g)
+
+        # Games also on team calendars already have their DTSTART/DTEND (and
+        # identical LOCATION/URL) lines rendered; reuse them. Their GAME INFO
+        # block lists game_rink() as the rink, which is the master calendar's
+        # rink (the location) too unless only a court is known.
+        rendered = team_game_render.get(g.game_id)
+        if rendered is not None and (location or not g.court):
+            desc_lines = rendered[1]
+        else:
+            desc_lines = game_info_lines(g, tz_name, location, footer)
+
+        uid = master_game_uid(str(g.game_id))
         ev_lines = ics_event(
             uid=uid,
             summary=summary,
@@ -872,101 +1443,63 @@ def main() -> None:
             tz_name=tz_name,
             description_lines=desc_lines,
             location=location,
-            url=str(cfg.get("checkin_url", "")),
+            url=event_url,
+            fixed_lines=rendered[0] if rendered is not None else None,
+            dtstamp=dtstamp,
         )
-        master_events.extend(ev_lines)
+        master_events.append("\r\n".join(ev_lines))
+
+    # Non-game days are parsed and rendered once, then shared by all calendars
+    day_refs = [parse_non_game_day(d) for d in non_game_days] if include_non_game_days else []
+    # Bodies are pre-joined and pre-folded: only the UID line differs between
+    # calendars, and folding is idempotent, so each calendar's fold pass finds
+    # nothing left to do in them
+    day_events: List[Tuple[NonGameDay, str]] = [
+        (day, fold_ics_text("\r\n".join(ics_allday_event_fixed_lines(day.title, day.day_date, [day.description] if day.description else []))))
+        for day in day_refs
+        if day.day_type in master_day_types or day.day_type in team_day_types
+    ]
 
     # Include non-game days as all-day events (master)
-    if include_non_game_days:
-        for d in non_game_days:
-            day_type = str(d.get("type") or "").strip()
-            if day_type not in master_day_types:
-                continue
-            day_date = parse_day_yyyy_mm_dd(str(d.get("day")))
-            title = str(d.get("get_type_display") or day_type).strip()
-            desc = (d.get("description") or "").strip()
-            summary = f"{title}"
-            uid = stable_uid("master-day", str(season_id), str(d.get("id")))
-            master_events.extend(
-                ics_allday_event(uid=uid, summary=summary, day_local=day_date, description_lines=[desc] if desc else [])
-            )
+    for day, day_body in day_events:
+        if day.day_type not in master_day_types:
+            continue
+        master_events.append(ics_vevent_block(master_day_uid(day.day_id), day_body, dtstamp))
 
     master_calname = f"BTSH All Games ({season_year})"
-    master_content = ics_calendar(master_calname, master_events, tz_name)
+    master_content = ics_calendar(master_calname, master_events, tz_name).encode("utf-8")
     master_path = os.path.join(out_dir, master_name_tmpl.format(year=season_year))
-    write_text(master_path, master_content)
 
     # Build each team calendar
-    for team_id, team in sorted(team_map.items(), key=lambda kv: kv[1].name.lower()):
-        team_events: List[str] = []
-
-        # Team games
-        for g in games:
-            # include games where team is participating OR (placeholder inclusion logic)
-            if not is_team_in_game(team_id, g):
-                continue
-            if not calendar_game_filter(g, team_day_types):
-                continue
-            if not g.start_local or not g.end_local:
-                continue
-
-            # Determine opponent name (even if placeholder)
-            if g.home_team_id == team_id:
-                opp_name = g.away_team_name
-            else:
-                opp_name = g.home_team_name
-
-            summary = build_summary_for_team_calendar(team, g, cfg, team_map)
-
-            location = ""
-            if g.location and g.court:
-                location = f"{g.location} ({g.court})"
-            elif g.location:
-                location = g.location
-
-            desc_lines = build_description_for_team_event(
-                calendar_team=team,
-                opponent_name=opp_name,
-                g=g,
-                all_games=games,
-                cfg=cfg,
-                tz_name=tz_name,
-            )
-
-            uid = stable_uid("team", str(team_id), str(season_id), str(g.game_id))
-            ev_lines = ics_event(
-                uid=uid,
-                summary=summary,
-                dtstart_local=g.start_local,
-                dtend_local=g.end_local,
-                tz_name=tz_name,
-                description_lines=desc_lines,
-                location=location,
-                url=str(cfg.get("checkin_url", "")),
-            )
-            team_events.extend(ev_lines)
-
-        # Team non-game days (all-day), only if configured day types include them
-        if include_non_game_days:
-            for d in non_game_days:
-                day_type = str(d.get("type") or "").strip()
-                if day_type not in team_day_types:
-                    continue
-                day_date = parse_day_yyyy_mm_dd(str(d.get("day")))
-                title = str(d.get("get_type_display") or day_type).strip()
-                desc = (d.get("description") or "").strip()
-                summary = f"{title}"
-                uid = stable_uid("team-day", str(team_id), str(season_id), str(d.get("id")))
-                team_events.extend(
-                    ics_allday_event(uid=uid, summary=summary, day_local=day_date, description_lines=[desc] if desc else [])
-                )
-
-        calname = f"BTSH {team.name} ({season_year})"
-        content = ics_calendar(calname, team_events, tz_name)
-
-        filename = f"{team_file_prefix}-{slugify(team.name)}-season-{season_year}.ics"
-        path = os.path.join(out_dir, filename)
-        write_text(path, content)
+    timelines = build_team_timelines(games)
+    ctx = TeamCalendarContext(
+        cfg=cfg,
+        tz_name=tz_name,
+        season_year=season_year,
+        season_id=season_id,
+        team_file_prefix=team_file_prefix,
+        team_map=team_map,
+        timelines=timelines,
+        matchups=build_matchup_timelines(games),
+        records=build_record_prefixes(timelines),
+        timeline_lines=build_timeline_lines(timelines),
+        games_by_team=games_by_team,
+        team_game_render=team_game_render,
+        team_day_events=[(day.day_id, day_body) for day, day_body in day_events if day.day_type in team_day_types],
+        dtstamp=dtstamp,
+    )
+    decorated = [(team.name.casefold(), team_id, team) for team_id, team in team_map.items()]
+    decorated.sort()
+    teams = [team for _, _, team in decorated]
+    # Lazy: each calendar is written out while the following ones are rendered
+    team_files = render_team_calendars(teams, ctx, workers)
+
+    if team_archive_tmpl:
+        write_bytes(master_path, master_content)
+        write_tar_archive(os.path.join(out_dir, str(team_archive_tmpl).format(year=season_year)), team_files, run_time.timestamp())
+    else:
+        team_paths = ((os.path.join(out_dir, name), content) for name, content in team_files)
+        write_files(itertools.chain([(master_path, master_content)], team_paths))
 
     print(f"Generated {len(team_map)} team calendars + master calendar for season {season_year} (id={season_id})")
     print(f"Output directory: {out_dir}")